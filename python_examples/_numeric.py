@@ -0,0 +1,463 @@
+"""
+MosesQuant Python示例的数值计算辅助模块
+
+示例策略优先使用Rust计算引擎计算指标；绑定未提供计算引擎时，
+改用本模块将多个标的的价格序列堆叠为 (N, L) 矩阵，一次性批量计算技术指标。
+
+约定：
+- 价格矩阵按行存放标的，按列存放时间，最新价格位于最后一列
+- 长度不足的序列在左侧以 NaN 填充
+- 指标输出与输入列对齐，无法计算的位置为 NaN
+- 指标支持 float64 与 float32 输入，输出与输入精度一致；
+  float32 可减半内存带宽，内部累加仍使用 float64
+
+安装 numba 时，指标内核以 @njit 编译为机器码并按行并行计算；
+未安装时退化为等价的 NumPy 向量化实现。内核在首次调用时才编译并写入磁盘缓存，
+导入本模块不触发编译；需要时由 precompile_sma_kernels 预先编译。
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """numba 不可用时的占位装饰器，直接返回原函数"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# 内核依赖 NaN 表示缺失值，因此不能启用 fastmath 的 nnan/ninf 假设
+_FASTMATH = {"reassoc", "contract", "arcp"}
+
+
+@njit(cache=True)
+def _first_valid(x):
+    """返回第一个非 NaN 元素的下标，全部为 NaN 时返回 len(x)"""
+    for i in range(x.shape[0]):
+        if not np.isnan(x[i]):
+            return i
+    return x.shape[0]
+
+
+# 以下内核的输入序列仅允许在左侧出现 NaN 填充。
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def sma_running(x, period):
+    """
+    简单移动平均（滑动窗口累加和）
+
+    每步只加入新值、减去移出窗口的旧值，复杂度 O(L)。
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan, x.dtype)
+    if period <= 0:
+        return out
+    start = _first_valid(x)
+    window_sum = 0.0
+    for i in range(start, n):
+        window_sum += x[i]
+        if i - start >= period:
+            window_sum -= x[i - period]
+        if i - start >= period - 1:
+            out[i] = window_sum / period
+    return out
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def ema_recursive(x, period):
+    """
+    指数移动平均
+
+    以前 period 个价格的简单平均为初值，之后按 alpha = 2 / (period + 1) 递推。
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan, x.dtype)
+    start = _first_valid(x)
+    if period <= 0 or n - start < period:
+        return out
+    alpha = 2.0 / (period + 1)
+    seed = 0.0
+    for i in range(start, start + period):
+        seed += x[i]
+    value = seed / period
+    out[start + period - 1] = value
+    for i in range(start + period, n):
+        value += alpha * (x[i] - value)
+        out[i] = value
+    return out
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _wilder_update(avg, value, seen, period):
+    """
+    Wilder平滑的单步递推，标量与数组均适用
+
+    seen 为已计入的涨跌幅个数（含本次）。前 period 个值累加简单平均作为初值，
+    之后按 avg = (avg * (period - 1) + value) / period 递推。
+    """
+    return (avg * (period - (seen > period)) + value) / period
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def rsi_wilder(x, period):
+    """
+    RSI（Wilder平滑）
+
+    前 period 个涨跌幅取简单平均作为初值，之后按
+    avg = (avg * (period - 1) + value) / period 递推。
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan, x.dtype)
+    start = _first_valid(x)
+    if period <= 0 or n - start <= period:
+        return out
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(start + 1, n):
+        change = x[i] - x[i - 1]
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        avg_gain = _wilder_update(avg_gain, gain, i - start, period)
+        avg_loss = _wilder_update(avg_loss, loss, i - start, period)
+        if i - start >= period:
+            total = avg_gain + avg_loss
+            out[i] = 100.0 * avg_gain / total if total > 0 else 50.0
+    return out
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _rsi_latest(x, period):
+    """只计算最后一个bar的RSI（Wilder平滑，递推同 rsi_wilder），数据不足时返回 NaN"""
+    n = x.shape[0]
+    start = _first_valid(x)
+    if period <= 0 or n - start <= period:
+        return np.nan
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(start + 1, n):
+        change = x[i] - x[i - 1]
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        avg_gain = _wilder_update(avg_gain, gain, i - start, period)
+        avg_loss = _wilder_update(avg_loss, loss, i - start, period)
+    total = avg_gain + avg_loss
+    return 100.0 * avg_gain / total if total > 0 else 50.0
+
+
+@njit(cache=True, parallel=True)
+def _sma_rows(prices_2d, period):
+    out = np.empty_like(prices_2d)
+    for row in prange(prices_2d.shape[0]):
+        out[row] = sma_running(prices_2d[row], period)
+    return out
+
+
+@njit(cache=True, parallel=True)
+def _rsi_rows(prices_2d, period):
+    out = np.empty_like(prices_2d)
+    for row in prange(prices_2d.shape[0]):
+        out[row] = rsi_wilder(prices_2d[row], period)
+    return out
+
+
+def precompile_sma_kernels() -> None:
+    """
+    预先编译 sma_batch 使用的 float64 内核
+
+    内核默认在首次调用时编译；没有计算引擎的模型在构造时调用此函数，
+    使首个交易周期不承担JIT编译开销。编译结果写入磁盘缓存，之后的进程直接加载。
+    """
+    if HAS_NUMBA:
+        _sma_rows(np.zeros((1, 1)), 1)
+
+
+def as_price_array(prices: Sequence[float]) -> np.ndarray:
+    """
+    将价格序列转换为连续的 float64 数组
+
+    已经是连续 float64 数组时直接返回原对象，不产生拷贝。
+    """
+    return np.ascontiguousarray(prices, dtype=np.float64)
+
+
+def stack_price_histories(histories: Sequence[Sequence[float]], length: int,
+                          dtype=np.float64) -> np.ndarray:
+    """
+    将多个价格序列右对齐堆叠为 (N, length) 的连续矩阵
+
+    Args:
+        histories: 各标的的价格序列
+        length: 矩阵列数，超出部分保留最新的 length 个价格
+        dtype: 矩阵精度，float64 或 float32
+
+    Returns:
+        价格矩阵，缺失位置为 NaN
+    """
+    stacked = np.full((len(histories), length), np.nan, dtype=dtype)
+    for row, prices in enumerate(histories):
+        tail = as_price_array(prices)[-length:]
+        if tail.size:
+            stacked[row, length - tail.size:] = tail
+    return stacked
+
+
+def sma_batch(prices_2d: np.ndarray, period: int) -> np.ndarray:
+    """
+    批量计算简单移动平均
+
+    Args:
+        prices_2d: (N, L) 价格矩阵
+        period: 移动平均周期
+
+    Returns:
+        (N, L) 移动平均矩阵，精度与输入一致
+    """
+    if HAS_NUMBA:
+        return _sma_rows(_as_kernel_input(prices_2d), period)
+    return _sma_batch_numpy(prices_2d, period)
+
+
+def rsi_batch(prices_2d: np.ndarray, period: int) -> np.ndarray:
+    """
+    批量计算RSI（Wilder平滑）
+
+    Args:
+        prices_2d: (N, L) 价格矩阵
+        period: RSI周期
+
+    Returns:
+        (N, L) RSI矩阵，取值范围 [0, 100]，精度与输入一致
+    """
+    if HAS_NUMBA:
+        return _rsi_rows(_as_kernel_input(prices_2d), period)
+    return _rsi_batch_numpy(prices_2d, period)
+
+
+def _as_kernel_input(prices_2d: np.ndarray) -> np.ndarray:
+    """保留 float32 输入，其余转换为连续的 float64 矩阵"""
+    dtype = np.float32 if prices_2d.dtype == np.float32 else np.float64
+    return np.ascontiguousarray(prices_2d, dtype=dtype)
+
+
+def _sma_batch_numpy(prices_2d: np.ndarray, period: int) -> np.ndarray:
+    """
+    sma_batch 的 NumPy 实现
+
+    使用累计和求窗口和，窗口内存在 NaN 的位置输出 NaN。
+    """
+    prices_2d = _as_kernel_input(prices_2d)
+    n_rows, n_cols = prices_2d.shape
+    out = np.full((n_rows, n_cols), np.nan, dtype=prices_2d.dtype)
+    if period <= 0 or period > n_cols:
+        return out
+
+    valid = ~np.isnan(prices_2d)
+    zero_col = np.zeros((n_rows, 1), dtype=np.float64)
+    value_sum = np.concatenate([zero_col, np.cumsum(np.where(valid, prices_2d, 0.0), axis=1, dtype=np.float64)], axis=1)
+    valid_count = np.concatenate([zero_col, np.cumsum(valid, axis=1)], axis=1)
+
+    window_sum = value_sum[:, period:] - value_sum[:, :-period]
+    window_count = valid_count[:, period:] - valid_count[:, :-period]
+    out[:, period - 1:] = np.where(window_count == period, window_sum / period, np.nan)
+    return out
+
+
+def _rsi_batch_numpy(prices_2d: np.ndarray, period: int) -> np.ndarray:
+    """
+    rsi_batch 的 NumPy 实现
+
+    每行从第一个有效价格开始独立计算，时间方向逐列推进，标的方向向量化。
+    """
+    prices_2d = _as_kernel_input(prices_2d)
+    n_rows, n_cols = prices_2d.shape
+    out = np.full((n_rows, n_cols), np.nan, dtype=prices_2d.dtype)
+    if period <= 0 or n_cols < 2:
+        return out
+
+    delta = np.diff(prices_2d, axis=1)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+
+    seen = np.zeros(n_rows, dtype=np.int64)
+    avg_gain = np.zeros(n_rows, dtype=np.float64)
+    avg_loss = np.zeros(n_rows, dtype=np.float64)
+
+    for col in range(n_cols - 1):
+        valid = ~np.isnan(delta[:, col])
+        seen += valid
+        avg_gain = np.where(valid, _wilder_update(avg_gain, gains[:, col], seen, period), avg_gain)
+        avg_loss = np.where(valid, _wilder_update(avg_loss, losses[:, col], seen, period), avg_loss)
+
+        ready = valid & (seen >= period)
+        total = avg_gain[ready] + avg_loss[ready]
+        out[ready, col + 1] = np.where(total > 0, 100.0 * avg_gain[ready] / np.where(total > 0, total, 1.0), 50.0)
+
+    return out
+
+
+def detect_crossings(fast_ma: np.ndarray, slow_ma: np.ndarray) -> np.ndarray:
+    """
+    检测快慢均线交叉
+
+    对 diff = fast_ma - slow_ma 整段序列一次性比较相邻符号，
+    可作用于一维序列或 (N, L) 矩阵的最后一维。
+
+    Args:
+        fast_ma: 快线序列
+        slow_ma: 慢线序列
+
+    Returns:
+        与输入同形状的 int8 数组：1 为金叉，-1 为死叉，0 为无交叉；
+        含 NaN 的位置及第一列恒为 0
+    """
+    diff = fast_ma - slow_ma
+    previous, current = diff[..., :-1], diff[..., 1:]
+    signals = np.zeros(diff.shape, dtype=np.int8)
+    signals[..., 1:] = np.where(
+        (previous <= 0) & (current > 0), 1,
+        np.where((previous >= 0) & (current < 0), -1, 0),
+    )
+    return signals
+
+
+class IncrementalSMA:
+    """
+    增量简单移动平均
+
+    维护窗口内的价格及其累加和，逐bar推入新价格时更新代价为 O(1)，
+    适用于逐bar驱动的回测，避免每个bar重新计算整段均线。
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+
+    @property
+    def ready(self) -> bool:
+        """窗口是否已填满"""
+        return len(self.window) == self.period
+
+    @property
+    def value(self) -> float:
+        """当前均线值，窗口未填满时为 NaN"""
+        return self.total / self.period if self.ready else np.nan
+
+    def push(self, price: float) -> float:
+        """
+        推入一个新价格
+
+        价格须为有限值，NaN 计入累加和后即使移出窗口也无法恢复，由调用方预先校验。
+
+        Returns:
+            更新后的均线值
+        """
+        if self.ready:
+            self.total -= self.window[0]
+        self.window.append(price)
+        self.total += price
+        return self.value
+
+
+def rsi_signals(latest_rsi: np.ndarray, overbought: float, oversold: float,
+                inv_band: float, conf_cap: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    由最新RSI批量生成信号方向和置信度
+
+    Args:
+        latest_rsi: 各标的的最新RSI，数据不足为 NaN
+        overbought: 超买阈值
+        oversold: 超卖阈值
+        inv_band: 置信度缩放系数
+        conf_cap: 置信度上限
+
+    Returns:
+        (方向, 置信度)：方向为 int8，超买为-1，超卖为1，其余为0；
+        置信度为 min(conf_cap, 超出阈值的幅度 * inv_band)，无信号处为0
+    """
+    latest_rsi = np.asarray(latest_rsi, dtype=np.float64)
+    over = latest_rsi - overbought
+    under = oversold - latest_rsi
+    direction = np.where(over > 0, -1, np.where(under > 0, 1, 0)).astype(np.int8)
+    confidence = np.minimum(conf_cap, np.maximum(over, under) * inv_band)
+    return direction, np.where(direction != 0, confidence, 0.0)
+
+
+RSISignalKernel = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray, np.ndarray]]
+
+
+def make_rsi_signal_kernel(period: int, overbought: float, oversold: float,
+                           inv_band: float, conf_cap: float, dtype=np.float64) -> RSISignalKernel:
+    """
+    生成针对固定参数特化的RSI信号内核
+
+    参数在策略构造后不再变化，作为闭包常量编译进内核，
+    编译器可以做常量传播并内联阈值比较。闭包内核无法写入 numba 磁盘缓存，
+    编译结果按参数在模块级缓存，参数相同的策略实例共享同一个内核。
+
+    内核输入 (N, L) 价格矩阵，返回三个长度为 N 的数组：
+    - 最新RSI（float64，数据不足为 NaN）
+    - 信号方向（int8，超买为-1，超卖为1，其余为0）
+    - 置信度 min(conf_cap, 超出阈值的幅度 * inv_band)（float64）
+
+    Args:
+        period: RSI周期
+        overbought: 超买阈值
+        oversold: 超卖阈值
+        inv_band: 置信度缩放系数
+        conf_cap: 置信度上限
+        dtype: 价格矩阵精度，float64 或 float32
+
+    Returns:
+        信号内核
+    """
+    return _build_rsi_signal_kernel(int(period), float(overbought), float(oversold),
+                                    float(inv_band), float(conf_cap), np.dtype(dtype).name)
+
+
+@lru_cache(maxsize=None)
+def _build_rsi_signal_kernel(period: int, overbought: float, oversold: float,
+                             inv_band: float, conf_cap: float, dtype_name: str) -> RSISignalKernel:
+    if not HAS_NUMBA:
+        def numpy_kernel(prices_2d):
+            latest_rsi = rsi_batch(prices_2d, period)[:, -1].astype(np.float64)
+            direction, confidence = rsi_signals(latest_rsi, overbought, oversold, inv_band, conf_cap)
+            return latest_rsi, direction, confidence
+        return numpy_kernel
+
+    # 只按所需精度编译一个签名并在首次构造时完成编译；
+    # 每行只做一次 O(L) 递推，串行编译比 parallel=True 快数倍且运行耗时相当
+    dtype = np.dtype(dtype_name)
+    signature = "Tuple((float64[:], int8[:], float64[:]))({}[:, :])".format(dtype_name)
+
+    @njit(signature, fastmath=_FASTMATH)
+    def kernel(prices_2d):
+        n_rows = prices_2d.shape[0]
+        latest_rsi = np.full(n_rows, np.nan)
+        direction = np.zeros(n_rows, dtype=np.int8)
+        confidence = np.zeros(n_rows)
+        for row in range(n_rows):
+            rsi = _rsi_latest(prices_2d[row], period)
+            latest_rsi[row] = rsi
+            if rsi > overbought:
+                direction[row] = -1
+                confidence[row] = min(conf_cap, (rsi - overbought) * inv_band)
+            elif rsi < oversold:
+                direction[row] = 1
+                confidence[row] = min(conf_cap, (oversold - rsi) * inv_band)
+        return latest_rsi, direction, confidence
+
+    def numba_kernel(prices_2d):
+        return kernel(np.ascontiguousarray(prices_2d, dtype=dtype))
+    return numba_kernel
@@ -8,9 +8,16 @@ MosesQuant Python策略示例
 
 import sys
 import os
-from typing import List, Dict, Optional
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+from functools import lru_cache, partial
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 # 导入MosesQuant Python绑定
 try:
     import moses_quant as mq
@@ -18,39 +25,324 @@ except ImportError:
     print("MosesQuant Python绑定未安装，请先编译安装")
     sys.exit(1)
 
+from _numeric import (
+    IncrementalSMA, as_price_array, stack_price_histories, sma_batch, detect_crossings,
+    rsi_signals, make_rsi_signal_kernel, precompile_sma_kernels,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _create_calculation_engine():
+    """
+    创建Rust计算引擎
+    
+    绑定未提供计算引擎时返回 None，示例模型改用 _numeric 中的实现计算指标。
+    """
+    engine_type = getattr(mq, "PyCalculationEngine", None)
+    return engine_type() if engine_type is not None else None
+
+
+class CachingDataProvider:
+    """
+    带缓存的数据提供者
+    
+    包装 PyDataProvider，按 (标的, 数据长度, 当前bar序号) 缓存历史价格。
+    多个模型在同一个bar内请求相同数据时直接命中内存，不再重复访问数据源。
+    
+    - 回测引擎推进到下一个bar时调用 advance()，旧缓存不再命中
+    - 设置 ttl（秒）后，缓存条目超过 ttl 也会失效，适用于实盘轮询
+    """
+    
+    def __init__(self, provider=None, maxsize: int = 4096, ttl: Optional[float] = None):
+        self.provider = provider if provider is not None else mq.PyDataProvider()
+        self.ttl = ttl
+        self._bar_index = 0
+        self._cached_history = lru_cache(maxsize=maxsize)(self._fetch_price_history)
+        
+    def advance(self):
+        """推进到下一个bar，使已缓存的历史数据失效"""
+        self._bar_index += 1
+        
+    def get_price_history(self, symbol: str, days: int) -> np.ndarray:
+        """获取历史价格，同一缓存周期内的重复请求直接返回缓存结果"""
+        return self._cached_history(symbol, days, self._cache_epoch())
+    
+    def get_market_snapshot(self, symbols: List[str]) -> Dict[str, float]:
+        """获取市场快照（实时数据，不缓存）"""
+        return self.provider.get_market_snapshot(symbols)
+    
+    def cache_info(self):
+        """返回缓存命中统计"""
+        return self._cached_history.cache_info()
+    
+    def _cache_epoch(self):
+        if self.ttl is None:
+            return self._bar_index
+        return self._bar_index, int(time.monotonic() // self.ttl)
+    
+    def _fetch_price_history(self, symbol: str, days: int, epoch) -> np.ndarray:
+        # 缓存只读视图，所有调用方共享同一块内存且无法修改缓存数据；
+        # 数据源返回的已是 float64 数组时 as_price_array 不拷贝，只冻结视图而不改动数据源持有的数组
+        prices = as_price_array(self.provider.get_price_history(symbol, days)).view()
+        prices.flags.writeable = False
+        return prices
+
+
+class Direction(IntEnum):
+    """
+    洞见方向
+    
+    以整数编码方向，比较时无需字符串比对，也可直接存入 int8 数组做向量化统计。
+    PyInsight 仍使用方向字符串，在边界处通过 _DIRECTION_LABELS 与 parse 转换。
+    
+    方向字符串取值见 PYTHON_GUIDE.md 中 PyInsight 的说明（"Up"/"Down"/"Flat"）。
+    """
+    UP = 1
+    DOWN = -1
+    FLAT = 0
+    
+    @classmethod
+    def parse(cls, value) -> "Direction":
+        """
+        由方向字符串或整数编码转换
+        
+        无法识别的方向字符串按 FLAT 处理：与原复合模型一致，
+        这类洞见计入“至少2个模型”的条件，但不为任何方向投票。
+        """
+        if isinstance(value, str):
+            return _DIRECTIONS_BY_LABEL.get(value, cls.FLAT)
+        return cls(value)
+
+
+# IntEnum 与整数哈希一致，可直接用 int8 编码查表
+_DIRECTION_LABELS = {Direction.UP: "Up", Direction.DOWN: "Down", Direction.FLAT: "Flat"}
+_DIRECTIONS_BY_LABEL = {label: direction for direction, label in _DIRECTION_LABELS.items()}
+
+
+def _new_py_insight(symbol: str, direction: int, confidence: Optional[float],
+                    magnitude: float, source_model: str) -> mq.PyInsight:
+    """创建并填充一个 PyInsight"""
+    insight = mq.PyInsight(symbol, _DIRECTION_LABELS[direction])
+    insight.confidence = confidence
+    insight.magnitude = magnitude
+    insight.source_model = source_model
+    return insight
+
+
+class _LocalInsight(NamedTuple):
+    """
+    模型内部使用的轻量洞见
+    
+    基于元组实现，无实例 __dict__，属性访问和内存占用都远低于绑定对象；
+    用于将用户模型返回的 PyInsight 转换为列式洞见。
+    """
+    symbol: str
+    direction: Direction
+    confidence: Optional[float] = None
+    magnitude: float = 1.0
+    source_model: str = ""
+    
+    @classmethod
+    def from_py(cls, insight: mq.PyInsight) -> "_LocalInsight":
+        """由 PyInsight 转换"""
+        return cls(insight.symbol, Direction.parse(insight.direction), insight.confidence,
+                   insight.magnitude, insight.source_model)
+
+
+class _InsightArrays(NamedTuple):
+    """
+    以列式（SoA）存放的一批洞见
+    
+    三个等长的并行数组，便于对整批洞见做向量化分组统计：
+    - symbols: 标的代码（object 数组）
+    - directions: 方向编码（int8，取值同 Direction）
+    - confidences: 置信度（float64，缺失为 NaN）
+    """
+    symbols: np.ndarray
+    directions: np.ndarray
+    confidences: np.ndarray
+    
+    @classmethod
+    def empty(cls) -> "_InsightArrays":
+        return cls(np.empty(0, dtype=object), np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64))
+    
+    @classmethod
+    def from_local(cls, insights: List[_LocalInsight]) -> "_InsightArrays":
+        """由轻量洞见列表转换"""
+        if not insights:
+            return cls.empty()
+        symbols, directions, confidences, _, _ = zip(*insights)
+        return cls(
+            np.array(symbols, dtype=object),
+            np.array(directions, dtype=np.int8),
+            np.array([np.nan if c is None else c for c in confidences], dtype=np.float64),
+        )
+    
+    @classmethod
+    def concatenate(cls, batches: List["_InsightArrays"]) -> "_InsightArrays":
+        """合并多批洞见"""
+        if not batches:
+            return cls.empty()
+        return cls(*(np.concatenate(columns) for columns in zip(*batches)))
+    
+    def to_py(self, source_model: str, magnitude: float = 1.0) -> List[mq.PyInsight]:
+        """
+        批量转换为 PyInsight
+        
+        一次性将各列转换为 Python 标量，直接创建绑定对象，
+        不经过中间的 _LocalInsight。
+        """
+        return [
+            _new_py_insight(symbol, direction, confidence, magnitude, source_model)
+            for symbol, direction, confidence in zip(
+                self.symbols.tolist(), self.directions.tolist(), self.confidences.tolist()
+            )
+        ]
+
 
 class BasePythonAlphaModel(ABC):
     """
     Python Alpha模型基类
     
     用户需要继承此类并实现具体的策略逻辑
+    
+    多个模型可以注入同一个 data_provider（如 CachingDataProvider），
+    共享历史数据缓存。max_workers 控制并发获取数据的线程数，
+    默认为1即顺序获取；绑定层尚未确认数据获取线程安全且释放 GIL，
+    确认后可设为大于1的线程数或 None（CPU核数）启用线程池，并在结束时调用 cleanup()。
     """
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, data_provider=None, max_workers: Optional[int] = 1):
         self.name = name
+        # 数据提供者只在构造时创建一次，避免每次生成洞见都重复创建绑定对象；
+        # 计算引擎由需要计算指标的子类按同样方式创建
         self.calculation_engine = None
-        self.data_provider = None
+        self.data_provider = data_provider if data_provider is not None else mq.PyDataProvider()
+        self.max_workers = max_workers
+        self._executor = None
+        # 最近一次获取数据时被跳过的标的及原因
+        self.errors: List[Tuple[str, str]] = []
+    
+    @property
+    def _required_window(self) -> int:
+        """
+        模型需要的历史数据长度
+        
+        复合模型据此一次性获取各子模型所需的最长窗口；
+        为0表示模型自行获取数据，不使用共享的价格数据。
+        """
+        return 0
         
     @abstractmethod
-    def generate_insights(self, symbols: List[str]) -> List[mq.PyInsight]:
+    def generate_insights(self, symbols: List[str], price_history: Optional[Dict[str, np.ndarray]] = None) -> List[mq.PyInsight]:
         """
         生成交易洞见
         
         Args:
             symbols: 需要分析的标的列表
+            price_history: 已获取的历史价格（标的 -> 价格数组），
+                提供时从中截取所需长度，不再向数据提供者请求
             
         Returns:
             洞见列表
         """
         pass
     
+    def _generate_insight_arrays(self, symbols: List[str], price_history: Optional[Dict[str, np.ndarray]] = None) -> _InsightArrays:
+        """
+        生成列式存放的洞见，供复合模型做向量化汇总
+        
+        默认由 generate_insights 的结果转换而来，自行获取数据并忽略 price_history；
+        内置模型直接重写此方法，避免先创建再读取 PyInsight。
+        """
+        return _InsightArrays.from_local(
+            [_LocalInsight.from_py(insight) for insight in self.generate_insights(symbols)]
+        )
+    
+    def _fetch_price_histories(self, symbols: List[str], lookback: int, min_length: int,
+                               price_history: Optional[Dict[str, np.ndarray]] = None) -> Tuple[List[str], List[np.ndarray]]:
+        """
+        获取多个标的的历史价格
+        
+        各标的的数据获取互不依赖，max_workers 不为1时使用线程池并发执行；
+        绑定层在 Rust 侧释放 GIL 时可获得接近核数的加速。
+        
+        Args:
+            symbols: 标的列表
+            lookback: 请求的历史数据长度
+            min_length: 最少需要的数据长度，不足的标的被跳过
+            price_history: 已获取的历史价格，提供时只截取最近 lookback 个数据，
+                不在其中的标的仍向数据提供者请求
+            
+        Returns:
+            (数据充足的标的列表, 对应的价格数组列表)；
+            获取失败或数据无效的标的记录在 self.errors 中
+        """
+        self.errors = []
+        fetch = partial(self._fetch_price_history, lookback=lookback, min_length=min_length,
+                        price_history=price_history)
+        results = self._map_symbols(fetch, symbols)
+        
+        fetched = [(symbol, prices) for symbol, prices in zip(symbols, results) if prices is not None]
+        if not fetched:
+            return [], []
+        valid_symbols, histories = zip(*fetched)
+        return list(valid_symbols), list(histories)
+    
+    def _fetch_price_history(self, symbol: str, lookback: int, min_length: int,
+                             price_history: Optional[Dict[str, np.ndarray]] = None) -> Optional[np.ndarray]:
+        prices = price_history.get(symbol) if price_history is not None else None
+        if prices is not None:
+            # 共享数据按最长窗口获取，截取最近 lookback 个即与单独请求一致
+            prices = as_price_array(prices)[-lookback:]
+        else:
+            # 只捕获数据源已知的失败类型（无此标的、数据格式错误），其余异常直接抛出
+            try:
+                prices = self._request_price_history(symbol, lookback)
+            except (ValueError, KeyError) as e:
+                return self._skip_symbol(symbol, f"处理错误 - {e}")
+        
+        # 预先校验数据，后续批量计算无需再做逐标的的异常处理
+        if len(prices) < min_length:
+            return self._skip_symbol(symbol, "数据不足，跳过")
+        if not np.isfinite(prices).all():
+            return self._skip_symbol(symbol, "价格数据包含无效值，跳过")
+        
+        return prices
+    
+    def _request_price_history(self, symbol: str, lookback: int) -> np.ndarray:
+        return as_price_array(self.data_provider.get_price_history(symbol, lookback))
+    
+    def _map_symbols(self, func, symbols: List[str]):
+        """对各标的依次执行 func，max_workers 不为1时使用线程池并发执行"""
+        if self.max_workers == 1 or len(symbols) < 2:
+            return map(func, symbols)
+        return self._get_executor().map(func, symbols)
+    
+    def _skip_symbol(self, symbol: str, reason: str) -> None:
+        self.errors.append((symbol, reason))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[%s] %s: %s", self.name, symbol, reason)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers or os.cpu_count(),
+                thread_name_prefix=self.name,
+            )
+        return self._executor
+    
     def initialize(self):
         """初始化策略"""
-        print(f"[{self.name}] 策略初始化")
+        logger.info("[%s] 策略初始化", self.name)
         
     def cleanup(self):
         """清理策略"""
-        print(f"[{self.name}] 策略清理")
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        logger.info("[%s] 策略清理", self.name)
 
 
 class RSIAlphaModel(BasePythonAlphaModel):
@@ -60,65 +352,88 @@ class RSIAlphaModel(BasePythonAlphaModel):
     基于RSI指标生成交易信号：
     - RSI > 70: 超买，生成卖出信号
     - RSI < 30: 超卖，生成买入信号
+    
+    RSI优先由Rust计算引擎逐标的计算；绑定未提供计算引擎时，
+    改用 _numeric 对所有标的批量计算，此时：
+    - 阈值比较只需约0.01的精度，默认以 float32 存放价格矩阵和RSI以减半内存带宽；
+      use_fp64=True 时使用 float64，便于与参考实现做回归对比
+    - 周期和阈值在构造时编译进专用的信号内核，构造后视为常量；闭包内核无法写入
+      numba 磁盘缓存，进程内每组新参数都要付出一次JIT编译（实测首个约0.8-1.0秒，
+      之后每组约0.2-0.4秒），参数相同的实例共享已编译的内核
     """
     
-    def __init__(self, rsi_period: int = 14, overbought: float = 70.0, oversold: float = 30.0):
-        super().__init__("RSI_Alpha_Model")
+    def __init__(self, rsi_period: int = 14, overbought: float = 70.0, oversold: float = 30.0,
+                 data_provider=None, max_workers: Optional[int] = 1, use_fp64: bool = False):
+        super().__init__("RSI_Alpha_Model", data_provider, max_workers)
+        self.calculation_engine = _create_calculation_engine()
         self.rsi_period = rsi_period
         self.overbought = overbought
         self.oversold = oversold
+        self.use_fp64 = use_fp64
+        # 置信度 = min(上限, 超出阈值的幅度 / 10)，倒数和上限预先计算
+        self._inv_band = 1.0 / 10.0
+        self._conf_cap = 0.9
+        self._dtype = np.float64 if use_fp64 else np.float32
+        self._signal_kernel = None
+        if self.calculation_engine is None:
+            self._signal_kernel = make_rsi_signal_kernel(
+                rsi_period, overbought, oversold, self._inv_band, self._conf_cap, self._dtype
+            )
         
-    def generate_insights(self, symbols: List[str]) -> List[mq.PyInsight]:
+    def generate_insights(self, symbols: List[str], price_history: Optional[Dict[str, np.ndarray]] = None) -> List[mq.PyInsight]:
         """基于RSI指标生成交易洞见"""
-        insights = []
+        return self._generate_insight_arrays(symbols, price_history).to_py(self.name)
+    
+    @property
+    def _required_window(self) -> int:
+        return 50  # 获取50天历史数据
+    
+    def _generate_insight_arrays(self, symbols: List[str], price_history: Optional[Dict[str, np.ndarray]] = None) -> _InsightArrays:
+        lookback = self._required_window
         
-        # 获取计算引擎
-        calc_engine = mq.PyCalculationEngine()
-        data_provider = mq.PyDataProvider()
+        # 收集所有标的的历史价格数据
+        valid_symbols, histories = self._fetch_price_histories(
+            symbols, lookback, self.rsi_period + 1, price_history
+        )
         
-        for symbol in symbols:
-            try:
-                # 获取历史价格数据
-                prices = data_provider.get_price_history(symbol, 50)  # 获取50天历史数据
-                
-                if len(prices) < self.rsi_period + 1:
-                    print(f"[{self.name}] {symbol}: 数据不足，跳过")
-                    continue
-                
-                # 计算RSI
-                rsi_values = calc_engine.calculate_rsi(prices, self.rsi_period)
-                
-                if not rsi_values:
-                    print(f"[{self.name}] {symbol}: RSI计算失败，跳过")
-                    continue
-                
-                latest_rsi = rsi_values[-1]
-                print(f"[{self.name}] {symbol}: RSI = {latest_rsi:.2f}")
-                
-                # 生成交易信号
-                if latest_rsi > self.overbought:
-                    # 超买信号 - 卖出
-                    insight = mq.PyInsight(symbol, "Down")
-                    insight.confidence = min(0.9, (latest_rsi - self.overbought) / 10.0)
-                    insight.magnitude = 1.0
-                    insight.source_model = self.name
-                    insights.append(insight)
-                    print(f"[{self.name}] {symbol}: 生成卖出信号 (RSI={latest_rsi:.2f})")
-                    
-                elif latest_rsi < self.oversold:
-                    # 超卖信号 - 买入
-                    insight = mq.PyInsight(symbol, "Up")
-                    insight.confidence = min(0.9, (self.oversold - latest_rsi) / 10.0)
-                    insight.magnitude = 1.0
-                    insight.source_model = self.name
-                    insights.append(insight)
-                    print(f"[{self.name}] {symbol}: 生成买入信号 (RSI={latest_rsi:.2f})")
-                    
-            except Exception as e:
-                print(f"[{self.name}] {symbol}: 处理错误 - {e}")
-                continue
+        if not valid_symbols:
+            return _InsightArrays.empty()
+        
+        # 计算所有标的的最新RSI及信号：
+        # 方向编码同 Direction：超买为 DOWN，超卖为 UP，其余为 FLAT
+        if self.calculation_engine is not None:
+            valid_symbols, latest_rsi = self._engine_latest_rsi(valid_symbols, histories)
+            direction, confidence = rsi_signals(
+                latest_rsi, self.overbought, self.oversold, self._inv_band, self._conf_cap
+            )
+        else:
+            prices_2d = stack_price_histories(histories, lookback, self._dtype)
+            latest_rsi, direction, confidence = self._signal_kernel(prices_2d)
         
-        return insights
+        # 只保留产生信号的标的
+        idx = np.flatnonzero(direction)
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, symbol in enumerate(valid_symbols):
+                logger.debug("[%s] %s: RSI = %.2f", self.name, symbol, latest_rsi[i])
+                if direction[i] != Direction.FLAT:
+                    action = "买入" if direction[i] == Direction.UP else "卖出"
+                    logger.debug("[%s] %s: 生成%s信号 (RSI=%.2f)", self.name, symbol, action, latest_rsi[i])
+        
+        return _InsightArrays(np.array(valid_symbols, dtype=object)[idx], direction[idx], confidence[idx])
+    
+    def _engine_latest_rsi(self, symbols: List[str],
+                           histories: List[np.ndarray]) -> Tuple[List[str], np.ndarray]:
+        """逐标的调用计算引擎，返回计算成功的标的及其最新RSI"""
+        computed_symbols = []
+        latest_rsi = []
+        for symbol, prices in zip(symbols, histories):
+            rsi_values = self.calculation_engine.calculate_rsi(prices, self.rsi_period)
+            if len(rsi_values) == 0:
+                self._skip_symbol(symbol, "RSI计算失败，跳过")
+                continue
+            computed_symbols.append(symbol)
+            latest_rsi.append(rsi_values[-1])
+        return computed_symbols, np.array(latest_rsi, dtype=np.float64)
 
 
 class MovingAverageCrossAlphaModel(BasePythonAlphaModel):
@@ -128,70 +443,153 @@ class MovingAverageCrossAlphaModel(BasePythonAlphaModel):
     基于快慢移动平均交叉生成交易信号：
     - 快线上穿慢线: 买入信号
     - 快线下穿慢线: 卖出信号
+    
+    移动平均优先由Rust计算引擎逐标的计算；绑定未提供计算引擎时，
+    改用 _numeric 对所有标的批量计算。
     """
     
-    def __init__(self, fast_period: int = 10, slow_period: int = 20):
-        super().__init__("MA_Cross_Alpha_Model")
+    def __init__(self, fast_period: int = 10, slow_period: int = 20, data_provider=None,
+                 max_workers: Optional[int] = 1):
+        super().__init__("MA_Cross_Alpha_Model", data_provider, max_workers)
+        self.calculation_engine = _create_calculation_engine()
+        if self.calculation_engine is None:
+            # 只有没有计算引擎时才由 _numeric 计算移动平均，此时才需要编译其内核
+            precompile_sma_kernels()
         self.fast_period = fast_period
         self.slow_period = slow_period
+        # 逐bar增量计算的状态：标的 -> (快线, 慢线) 以及上一个bar的快慢线差值
+        self._incremental: Dict[str, Tuple[IncrementalSMA, IncrementalSMA]] = {}
+        self._last_spread: Dict[str, float] = {}
         
-    def generate_insights(self, symbols: List[str]) -> List[mq.PyInsight]:
+    def generate_insights(self, symbols: List[str], price_history: Optional[Dict[str, np.ndarray]] = None) -> List[mq.PyInsight]:
         """基于移动平均交叉生成交易洞见"""
-        insights = []
+        return self._generate_insight_arrays(symbols, price_history).to_py(self.name)
+    
+    @property
+    def _required_window(self) -> int:
+        return max(self.fast_period, self.slow_period) + 10
+    
+    def _generate_insight_arrays(self, symbols: List[str], price_history: Optional[Dict[str, np.ndarray]] = None) -> _InsightArrays:
+        lookback = self._required_window
         
-        # 获取计算引擎
-        calc_engine = mq.PyCalculationEngine()
-        data_provider = mq.PyDataProvider()
+        # 收集所有标的的历史价格数据
+        valid_symbols, histories = self._fetch_price_histories(
+            symbols, lookback, self.slow_period + 2, price_history
+        )
         
-        for symbol in symbols:
-            try:
-                # 获取历史价格数据
-                prices = data_provider.get_price_history(symbol, max(self.fast_period, self.slow_period) + 10)
-                
-                if len(prices) < self.slow_period + 2:
-                    print(f"[{self.name}] {symbol}: 数据不足，跳过")
-                    continue
-                
-                # 计算快慢移动平均
-                fast_ma = calc_engine.calculate_sma(prices, self.fast_period)
-                slow_ma = calc_engine.calculate_sma(prices, self.slow_period)
-                
-                if len(fast_ma) < 2 or len(slow_ma) < 2:
-                    print(f"[{self.name}] {symbol}: 移动平均计算失败，跳过")
-                    continue
-                
-                # 获取最新和前一个的移动平均值
-                fast_current = fast_ma[-1]
-                fast_previous = fast_ma[-2]
-                slow_current = slow_ma[-1]
-                slow_previous = slow_ma[-2]
-                
-                print(f"[{self.name}] {symbol}: 快线={fast_current:.2f}, 慢线={slow_current:.2f}")
-                
-                # 检测交叉信号
-                # 金叉：快线上穿慢线
-                if fast_previous <= slow_previous and fast_current > slow_current:
-                    insight = mq.PyInsight(symbol, "Up")
-                    insight.confidence = 0.7
-                    insight.magnitude = 1.0
-                    insight.source_model = self.name
-                    insights.append(insight)
-                    print(f"[{self.name}] {symbol}: 金叉买入信号")
-                    
-                # 死叉：快线下穿慢线
-                elif fast_previous >= slow_previous and fast_current < slow_current:
-                    insight = mq.PyInsight(symbol, "Down")
-                    insight.confidence = 0.7
-                    insight.magnitude = 1.0
-                    insight.source_model = self.name
-                    insights.append(insight)
-                    print(f"[{self.name}] {symbol}: 死叉卖出信号")
-                    
-            except Exception as e:
-                print(f"[{self.name}] {symbol}: 处理错误 - {e}")
+        if not valid_symbols:
+            return _InsightArrays.empty()
+        
+        # 计算所有标的最近两个bar的快慢移动平均
+        if self.calculation_engine is not None:
+            valid_symbols, fast_ma, slow_ma = self._engine_latest_sma(valid_symbols, histories)
+        else:
+            prices_2d = stack_price_histories(histories, lookback)
+            fast_ma = sma_batch(prices_2d, self.fast_period)[:, -2:]
+            slow_ma = sma_batch(prices_2d, self.slow_period)[:, -2:]
+        
+        # 只需判断最新一个bar是否发生交叉（含 NaN 的位置不产生信号）
+        # 方向编码同 Direction：金叉（快线上穿慢线）为 UP，死叉（快线下穿慢线）为 DOWN
+        crossings = detect_crossings(fast_ma, slow_ma)[:, -1]
+        
+        idx = np.flatnonzero(crossings)
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, symbol in enumerate(valid_symbols):
+                logger.debug("[%s] %s: 快线=%.2f, 慢线=%.2f", self.name, symbol, fast_ma[i, -1], slow_ma[i, -1])
+                if crossings[i] != Direction.FLAT:
+                    signal = "金叉买入" if crossings[i] == Direction.UP else "死叉卖出"
+                    logger.debug("[%s] %s: %s信号", self.name, symbol, signal)
+        
+        return _InsightArrays(
+            np.array(valid_symbols, dtype=object)[idx],
+            crossings[idx],
+            np.full(idx.size, 0.7),
+        )
+    
+    def _engine_latest_sma(self, symbols: List[str], histories: List[np.ndarray]
+                           ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """逐标的调用计算引擎，返回计算成功的标的及其最近两个bar的快慢线 (N, 2)"""
+        computed_symbols = []
+        fast_last = []
+        slow_last = []
+        for symbol, prices in zip(symbols, histories):
+            fast_ma = self.calculation_engine.calculate_sma(prices, self.fast_period)
+            slow_ma = self.calculation_engine.calculate_sma(prices, self.slow_period)
+            if len(fast_ma) < 2 or len(slow_ma) < 2:
+                self._skip_symbol(symbol, "移动平均计算失败，跳过")
                 continue
+            computed_symbols.append(symbol)
+            fast_last.append(fast_ma[-2:])
+            slow_last.append(slow_ma[-2:])
+        return (
+            computed_symbols,
+            np.array(fast_last, dtype=np.float64).reshape(-1, 2),
+            np.array(slow_last, dtype=np.float64).reshape(-1, 2),
+        )
+    
+    def generate_insights_vectorized(self, symbol: str, full_prices) -> List[Tuple[int, mq.PyInsight]]:
+        """
+        对完整历史一次性生成交叉信号时间线
+        
+        回测时无需逐bar重复计算整段移动平均，只需对全部历史计算一次
+        快慢均线并检测所有交叉点。
         
-        return insights
+        Args:
+            symbol: 标的代码
+            full_prices: 完整的历史价格序列
+            
+        Returns:
+            (bar下标, 洞见) 列表，按时间顺序排列
+        """
+        prices_2d = as_price_array(full_prices)[np.newaxis, :]
+        fast_ma = sma_batch(prices_2d, self.fast_period)
+        slow_ma = sma_batch(prices_2d, self.slow_period)
+        crossings = detect_crossings(fast_ma, slow_ma)[0]
+        
+        bar_indices = np.flatnonzero(crossings)
+        signals = _InsightArrays(
+            np.full(bar_indices.size, symbol, dtype=object),
+            crossings[bar_indices],
+            np.full(bar_indices.size, 0.7),
+        )
+        return list(zip(bar_indices.tolist(), signals.to_py(self.name)))
+    
+    def update(self, symbol: str, price: float) -> Optional[mq.PyInsight]:
+        """
+        推入一个新bar的价格，增量判断是否发生交叉
+        
+        每个bar只更新快慢线的滑动窗口，代价为 O(1)，
+        逐bar回测的总代价从 O(L²) 降为 O(L)。
+        
+        Args:
+            symbol: 标的代码
+            price: 最新bar的价格
+            
+        Returns:
+            发生交叉时返回洞见，否则返回 None；无效价格不推入窗口，记录在 self.errors 中
+        """
+        # 与批量路径一致预先校验价格：NaN 一旦计入累加和将永久污染均线
+        if not np.isfinite(price):
+            return self._skip_symbol(symbol, "价格数据包含无效值，跳过")
+        
+        state = self._incremental.get(symbol)
+        if state is None:
+            state = (IncrementalSMA(self.fast_period), IncrementalSMA(self.slow_period))
+            self._incremental[symbol] = state
+        fast_sma, slow_sma = state
+        
+        spread = fast_sma.push(price) - slow_sma.push(price)
+        previous = self._last_spread.get(symbol, np.nan)
+        self._last_spread[symbol] = spread
+        
+        # 与 detect_crossings 判定一致，含 NaN 的比较结果为 False
+        if previous <= 0 < spread:
+            direction = Direction.UP
+        elif previous >= 0 > spread:
+            direction = Direction.DOWN
+        else:
+            return None
+        return _new_py_insight(symbol, direction, 0.7, 1.0, self.name)
 
 
 class CompositeAlphaModel(BasePythonAlphaModel):
@@ -199,58 +597,96 @@ class CompositeAlphaModel(BasePythonAlphaModel):
     复合Alpha模型示例
     
     结合多个Alpha模型的信号，生成综合交易洞见
+    
+    与复合模型使用同一个 data_provider 的子模型数据窗口相互重叠，
+    复合模型只按其中最长的窗口获取一次原始数据，子模型从中截取并校验各自所需的部分；
+    使用其他数据提供者的子模型仍自行获取数据。
     """
     
-    def __init__(self, models: List[BasePythonAlphaModel]):
-        super().__init__("Composite_Alpha_Model")
+    def __init__(self, models: List[BasePythonAlphaModel], data_provider=None):
+        super().__init__("Composite_Alpha_Model", data_provider)
         self.models = models
         
-    def generate_insights(self, symbols: List[str]) -> List[mq.PyInsight]:
+    def generate_insights(self, symbols: List[str], price_history: Optional[Dict[str, np.ndarray]] = None) -> List[mq.PyInsight]:
         """综合多个模型的洞见"""
-        all_insights = []
-        
-        # 收集所有模型的洞见
-        for model in self.models:
-            model_insights = model.generate_insights(symbols)
-            all_insights.extend(model_insights)
-        
-        # 按标的分组洞见
-        insights_by_symbol = {}
-        for insight in all_insights:
-            symbol = insight.symbol
-            if symbol not in insights_by_symbol:
-                insights_by_symbol[symbol] = []
-            insights_by_symbol[symbol].append(insight)
-        
-        # 生成综合洞见
-        composite_insights = []
-        for symbol, symbol_insights in insights_by_symbol.items():
-            if len(symbol_insights) >= 2:  # 至少需要2个模型同意
-                # 计算平均置信度和方向
-                up_insights = [i for i in symbol_insights if i.direction == "Up"]
-                down_insights = [i for i in symbol_insights if i.direction == "Down"]
-                
-                if len(up_insights) > len(down_insights):
-                    # 综合买入信号
-                    avg_confidence = sum(i.confidence or 0.5 for i in up_insights) / len(up_insights)
-                    composite_insight = mq.PyInsight(symbol, "Up")
-                    composite_insight.confidence = avg_confidence
-                    composite_insight.magnitude = 1.0
-                    composite_insight.source_model = self.name
-                    composite_insights.append(composite_insight)
-                    print(f"[{self.name}] {symbol}: 综合买入信号 (置信度={avg_confidence:.2f})")
-                    
-                elif len(down_insights) > len(up_insights):
-                    # 综合卖出信号
-                    avg_confidence = sum(i.confidence or 0.5 for i in down_insights) / len(down_insights)
-                    composite_insight = mq.PyInsight(symbol, "Down")
-                    composite_insight.confidence = avg_confidence
-                    composite_insight.magnitude = 1.0
-                    composite_insight.source_model = self.name
-                    composite_insights.append(composite_insight)
-                    print(f"[{self.name}] {symbol}: 综合卖出信号 (置信度={avg_confidence:.2f})")
-        
-        return composite_insights
+        return self._generate_insight_arrays(symbols, price_history).to_py(self.name)
+    
+    @property
+    def _required_window(self) -> int:
+        return max((model._required_window for model in self.models if self._shares_data(model)), default=0)
+    
+    def _shares_data(self, model: BasePythonAlphaModel) -> bool:
+        """子模型是否与复合模型使用同一个数据提供者"""
+        return model.data_provider is self.data_provider
+    
+    def _generate_insight_arrays(self, symbols: List[str], price_history: Optional[Dict[str, np.ndarray]] = None) -> _InsightArrays:
+        # 按最长窗口一次性获取共享数据；嵌套时沿用外层已获取的数据
+        max_window = self._required_window
+        if price_history is None and max_window > 0:
+            price_history = self._prefetch_price_history(symbols, max_window)
+        
+        # 收集所有模型的洞见（列式存放，不经过 PyInsight）
+        merged = _InsightArrays.concatenate([
+            model._generate_insight_arrays(symbols, price_history if self._shares_data(model) else None)
+            for model in self.models
+        ])
+        if not merged.symbols.size:
+            return _InsightArrays.empty()
+        
+        # 按标的分组：inverse 为每条洞见所属标的的组号
+        unique_symbols, first_index, inverse = np.unique(
+            merged.symbols, return_index=True, return_inverse=True
+        )
+        n_groups = unique_symbols.size
+        
+        # 缺失或为0的置信度按0.5计
+        confidences = np.where(np.isnan(merged.confidences) | (merged.confidences == 0),
+                               0.5, merged.confidences)
+        
+        # 以 (标的, 方向) 为键单次归约出数量与置信度之和：
+        # 每个标的占3个槽位，槽位号为 Direction + 1，依次对应 DOWN/FLAT/UP
+        bins = inverse * 3 + (merged.directions + 1)
+        counts = np.bincount(bins, minlength=3 * n_groups).reshape(n_groups, 3)
+        sums = np.bincount(bins, weights=confidences, minlength=3 * n_groups).reshape(n_groups, 3)
+        
+        # 至少需要2个模型同意，且多数方向占优；方向只需比较一次
+        enough = counts.sum(axis=1) >= 2
+        direction = np.where(enough, np.sign(counts[:, 2] - counts[:, 0]), 0).astype(np.int8)
+        
+        # 占优方向槽位内的平均置信度
+        rows = np.arange(n_groups)
+        winner = direction + 1
+        avg_confidence = sums[rows, winner] / np.maximum(counts[rows, winner], 1)
+        
+        # 按标的首次出现的顺序输出综合洞见
+        order = np.argsort(first_index)
+        idx = order[direction[order] != 0]
+        if logger.isEnabledFor(logging.DEBUG):
+            for i in idx:
+                action = "买入" if direction[i] == Direction.UP else "卖出"
+                logger.debug("[%s] %s: 综合%s信号 (置信度=%.2f)",
+                             self.name, unique_symbols[i], action, avg_confidence[i])
+        
+        return _InsightArrays(unique_symbols[idx], direction[idx], avg_confidence[idx])
+    
+    def _prefetch_price_history(self, symbols: List[str], lookback: int) -> Dict[str, np.ndarray]:
+        """
+        按最长窗口获取共享的原始价格数据
+        
+        不做校验，各子模型只校验自己截取的部分；获取失败的标的不放入结果，
+        由子模型自行获取并记录实际的失败原因。
+        """
+        def fetch(symbol: str) -> Optional[np.ndarray]:
+            try:
+                return self._request_price_history(symbol, lookback)
+            except (ValueError, KeyError):
+                return None
+        
+        return {
+            symbol: prices
+            for symbol, prices in zip(symbols, self._map_symbols(fetch, symbols))
+            if prices is not None
+        }
 
 
 def demonstrate_python_strategy():
@@ -263,10 +699,14 @@ def demonstrate_python_strategy():
     # 测试标的
     symbols = ["BTCUSDT", "ETHUSDT", "ADAUSDT", "SOLUSDT"]
     
+    # 所有模型共享同一个带缓存的数据提供者
+    shared_data_provider = CachingDataProvider()
+    
     # 1. RSI策略演示
     print("\n1. RSI策略演示")
     print("-" * 40)
-    rsi_model = RSIAlphaModel(rsi_period=14, overbought=70.0, oversold=30.0)
+    rsi_model = RSIAlphaModel(rsi_period=14, overbought=70.0, oversold=30.0,
+                              data_provider=shared_data_provider)
     rsi_model.initialize()
     rsi_insights = rsi_model.generate_insights(symbols)
     
@@ -277,7 +717,8 @@ def demonstrate_python_strategy():
     # 2. 移动平均交叉策略演示
     print("\n2. 移动平均交叉策略演示")
     print("-" * 40)
-    ma_model = MovingAverageCrossAlphaModel(fast_period=10, slow_period=20)
+    ma_model = MovingAverageCrossAlphaModel(fast_period=10, slow_period=20,
+                                            data_provider=shared_data_provider)
     ma_model.initialize()
     ma_insights = ma_model.generate_insights(symbols)
     
@@ -288,7 +729,7 @@ def demonstrate_python_strategy():
     # 3. 复合策略演示
     print("\n3. 复合策略演示")
     print("-" * 40)
-    composite_model = CompositeAlphaModel([rsi_model, ma_model])
+    composite_model = CompositeAlphaModel([rsi_model, ma_model], data_provider=shared_data_provider)
     composite_model.initialize()
     composite_insights = composite_model.generate_insights(symbols)
     
@@ -302,8 +743,8 @@ def demonstrate_python_strategy():
     calc_engine = mq.PyCalculationEngine()
     data_provider = mq.PyDataProvider()
     
-    # 获取示例数据
-    prices = data_provider.get_price_history("BTCUSDT", 30)
+    # 获取示例数据，只转换一次为连续数组并在各指标计算中复用
+    prices = as_price_array(data_provider.get_price_history("BTCUSDT", 30))
     print(f"获取到 {len(prices)} 个价格数据点")
     
     # 计算各种指标
@@ -316,7 +757,7 @@ def demonstrate_python_strategy():
     print(f"RSI(14): {rsi_14[-1]:.2f}")
     
     # 计算收益率
-    returns = [(prices[i] - prices[i-1]) / prices[i-1] for i in range(1, len(prices))]
+    returns = np.diff(prices) / prices[:-1]
     
     # 计算风险指标
     risk_metrics = calc_engine.calculate_risk_metrics(returns)
@@ -331,4 +772,6 @@ def demonstrate_python_strategy():
 
 
 if __name__ == "__main__":
+    # 演示时输出策略日志；逐标的的明细日志为 DEBUG 级别，需要时可调低日志级别
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     demonstrate_python_strategy()
\ No newline at end of file
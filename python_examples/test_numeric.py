@@ -0,0 +1,155 @@
+"""
+_numeric 指标内核测试
+
+安装 numba 时，校验编译内核与 NumPy 实现的结果一致。
+"""
+
+import numpy as np
+import pytest
+
+import _numeric
+from _numeric import (
+    make_rsi_signal_kernel, rsi_signals, stack_price_histories,
+    _rsi_batch_numpy, _sma_batch_numpy,
+)
+
+requires_numba = pytest.mark.skipif(not _numeric.HAS_NUMBA, reason="numba 未安装")
+
+
+def _random_prices(seed: int = 7) -> np.ndarray:
+    """生成长度不一的随机价格序列并右对齐堆叠，包含平价和数据不足的行"""
+    rng = np.random.default_rng(seed)
+    histories = [100.0 * np.cumprod(1.0 + rng.normal(0.0, 0.02, size)) for size in rng.integers(5, 60, 40)]
+    histories.append(np.full(30, 100.0))
+    histories.append(np.array([100.0]))
+    return stack_price_histories(histories, 60)
+
+
+@requires_numba
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("period", [1, 5, 14])
+def test_sma_batch_matches_numpy(dtype, period):
+    prices = _random_prices().astype(dtype)
+    result = _numeric.sma_batch(prices, period)
+    expected = _sma_batch_numpy(prices, period)
+    assert result.dtype == expected.dtype == dtype
+    np.testing.assert_allclose(result, expected, rtol=1e-5 if dtype == np.float32 else 1e-10)
+
+
+@requires_numba
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("period", [2, 14])
+def test_rsi_batch_matches_numpy(dtype, period):
+    prices = _random_prices().astype(dtype)
+    result = _numeric.rsi_batch(prices, period)
+    expected = _rsi_batch_numpy(prices, period)
+    assert result.dtype == expected.dtype == dtype
+    np.testing.assert_allclose(result, expected, rtol=1e-4 if dtype == np.float32 else 1e-10)
+
+
+@requires_numba
+def test_rsi_kernels_match_batch_rows():
+    prices = _random_prices()
+    batch = _numeric.rsi_batch(prices, 14)
+    for row in range(prices.shape[0]):
+        np.testing.assert_allclose(_numeric.rsi_wilder(prices[row], 14), batch[row], rtol=1e-12)
+
+
+@requires_numba
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_rsi_signal_kernel_matches_numpy(dtype):
+    prices = _random_prices(11)
+    kernel = make_rsi_signal_kernel(14, 60.0, 40.0, 0.1, 0.9, dtype)
+    latest_rsi, direction, confidence = kernel(prices)
+
+    expected_rsi = _rsi_batch_numpy(prices.astype(dtype), 14)[:, -1].astype(np.float64)
+    expected_direction, expected_confidence = rsi_signals(expected_rsi, 60.0, 40.0, 0.1, 0.9)
+    np.testing.assert_allclose(latest_rsi, expected_rsi, rtol=1e-4 if dtype == np.float32 else 1e-10)
+    np.testing.assert_array_equal(direction, expected_direction)
+    np.testing.assert_allclose(confidence, expected_confidence, rtol=1e-4, atol=1e-6)
+    assert direction.any()
+
+
+def _reference_sma(prices, period):
+    """逐窗口求均值的参考实现"""
+    out = [np.nan] * len(prices)
+    for i in range(period - 1, len(prices)):
+        out[i] = sum(prices[i - period + 1:i + 1]) / period
+    return out
+
+
+def _reference_ema(prices, period):
+    """以首个窗口均值为初值的参考实现"""
+    out = [np.nan] * len(prices)
+    if len(prices) < period:
+        return out
+    alpha = 2.0 / (period + 1)
+    out[period - 1] = sum(prices[:period]) / period
+    for i in range(period, len(prices)):
+        out[i] = alpha * prices[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+
+def _reference_rsi(prices, period):
+    """按 Wilder 原始定义 RSI = 100 - 100 / (1 + RS) 的参考实现"""
+    out = [np.nan] * len(prices)
+    changes = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
+    if len(changes) < period:
+        return out
+    avg_gain = sum(max(c, 0.0) for c in changes[:period]) / period
+    avg_loss = sum(max(-c, 0.0) for c in changes[:period]) / period
+    for i in range(period, len(changes) + 1):
+        if i > period:
+            change = changes[i - 1]
+            avg_gain = (avg_gain * (period - 1) + max(change, 0.0)) / period
+            avg_loss = (avg_loss * (period - 1) + max(-change, 0.0)) / period
+        if avg_loss == 0.0:
+            out[i] = 50.0 if avg_gain == 0.0 else 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+
+def test_kernels_known_values():
+    prices = np.array([1.0, 2.0, 3.0, 2.0, 3.0])
+    np.testing.assert_allclose(_numeric.sma_running(prices, 2), [np.nan, 1.5, 2.5, 2.5, 2.5])
+    np.testing.assert_allclose(_numeric.ema_recursive(np.arange(1.0, 6.0), 2), [np.nan, 1.5, 2.5, 3.5, 4.5])
+    # 涨跌幅 +1,+1,-1,+1：初值 gain=1, loss=0 -> 100；之后 gain=loss=0.5 -> 50；再 gain=0.75, loss=0.25 -> 75
+    np.testing.assert_allclose(_numeric.rsi_wilder(prices, 2), [np.nan, np.nan, 100.0, 50.0, 75.0])
+
+
+@pytest.mark.parametrize("period", [1, 3, 14])
+def test_kernels_match_reference(period):
+    rng = np.random.default_rng(period)
+    prices = 100.0 * np.cumprod(1.0 + rng.normal(0.0, 0.02, 80))
+    padded = np.concatenate([np.full(5, np.nan), prices])
+
+    for kernel, reference in ((_numeric.sma_running, _reference_sma),
+                              (_numeric.ema_recursive, _reference_ema),
+                              (_numeric.rsi_wilder, _reference_rsi)):
+        expected = reference(prices.tolist(), period)
+        np.testing.assert_allclose(kernel(prices, period), expected, rtol=1e-10)
+        # 左侧 NaN 填充不影响有效部分的结果
+        np.testing.assert_allclose(kernel(padded, period)[5:], expected, rtol=1e-10)
+        assert np.isnan(kernel(padded, period)[:5]).all()
+
+
+def test_batch_rsi_matches_reference():
+    prices = _random_prices(3)
+    expected = [_reference_rsi(row[~np.isnan(row)].tolist(), 14) for row in prices]
+    for batch in (_numeric.rsi_batch(prices, 14), _rsi_batch_numpy(prices, 14)):
+        for row, values in zip(batch, expected):
+            np.testing.assert_allclose(row[row.size - len(values):], values, rtol=1e-10)
+
+
+def test_flat_prices_give_neutral_rsi():
+    prices = stack_price_histories([np.full(20, 50.0)], 20)
+    assert _numeric.rsi_batch(prices, 14)[0, -1] == 50.0
+    assert _rsi_batch_numpy(prices, 14)[0, -1] == 50.0
+
+
+def test_incremental_sma_matches_running_sma():
+    prices = 100.0 * np.cumprod(1.0 + np.random.default_rng(4).normal(0.0, 0.02, 200))
+    sma = _numeric.IncrementalSMA(7)
+    values = [sma.push(price) for price in prices]
+    np.testing.assert_allclose(values, _numeric.sma_running(prices, 7), rtol=1e-10)
@@ -0,0 +1,150 @@
+"""
+strategy_example 测试
+
+未编译 MosesQuant 绑定时以最小桩模块代替 moses_quant，只提供被测代码用到的部分；
+此时模型没有计算引擎，指标由 _numeric 计算。
+"""
+
+import random
+import sys
+import types
+
+import numpy as np
+import pytest
+
+try:
+    import moses_quant  # noqa: F401
+except ImportError:
+    class _StubInsight:
+        def __init__(self, symbol, direction):
+            self.symbol = symbol
+            self.direction = direction
+            self.confidence = None
+            self.magnitude = None
+            self.source_model = None
+
+    class _StubDataProvider:
+        def get_price_history(self, symbol, days):
+            raise KeyError(symbol)
+
+    _stub = types.ModuleType("moses_quant")
+    _stub.VERSION = "stub"
+    _stub.PyInsight = _StubInsight
+    _stub.PyDataProvider = _StubDataProvider
+    sys.modules["moses_quant"] = _stub
+
+import strategy_example as se  # noqa: E402
+
+
+class _FixedModel(se.BasePythonAlphaModel):
+    """返回固定洞见的用户模型，只实现 generate_insights"""
+
+    def __init__(self, insights):
+        super().__init__("Fixed")
+        self.insights = [
+            types.SimpleNamespace(symbol=symbol, direction=direction, confidence=confidence,
+                                  magnitude=1.0, source_model="Fixed")
+            for symbol, direction, confidence in insights
+        ]
+
+    def generate_insights(self, symbols, price_history=None):
+        return self.insights
+
+
+def _reference_composite(models, symbols):
+    """原示例中按标的分组、逐个统计的综合逻辑"""
+    insights_by_symbol = {}
+    for model in models:
+        for insight in model.generate_insights(symbols):
+            insights_by_symbol.setdefault(insight.symbol, []).append(insight)
+
+    result = []
+    for symbol, symbol_insights in insights_by_symbol.items():
+        if len(symbol_insights) >= 2:
+            up = [i for i in symbol_insights if i.direction == "Up"]
+            down = [i for i in symbol_insights if i.direction == "Down"]
+            if len(up) > len(down):
+                result.append((symbol, "Up", sum(i.confidence or 0.5 for i in up) / len(up)))
+            elif len(down) > len(up):
+                result.append((symbol, "Down", sum(i.confidence or 0.5 for i in down) / len(down)))
+    return result
+
+
+def _composite(models, symbols):
+    return [
+        (insight.symbol, insight.direction, insight.confidence)
+        for insight in se.CompositeAlphaModel(models).generate_insights(symbols)
+    ]
+
+
+def test_composite_known_case():
+    models = [
+        _FixedModel([("A", "Up", 0.6), ("B", "Down", 0.4), ("C", "Up", None), ("D", "Up", 0.3)]),
+        _FixedModel([("A", "Up", 0.8), ("B", "Down", 0.2), ("C", "Down", 0.5), ("E", "Down", 0.9)]),
+        _FixedModel([("B", "Up", 0.1), ("C", "Up", 0.7), ("D", "Flat", 0.0)]),
+    ]
+    # C: 缺失置信度按0.5计；D: FLAT 计入“至少2个模型”但双方票数为 1:0，输出 Up
+    result = _composite(models, list("ABCDE"))
+    assert [item[:2] for item in result] == [("A", "Up"), ("B", "Down"), ("C", "Up"), ("D", "Up")]
+    assert [item[2] for item in result] == pytest.approx([0.7, 0.3, 0.6, 0.3])
+
+
+def test_composite_treats_unknown_direction_as_flat():
+    models = [
+        _FixedModel([("A", "Up", 0.4), ("B", "Sideways", 0.9)]),
+        _FixedModel([("A", "Sideways", 0.9), ("B", "Sideways", 0.9)]),
+    ]
+    assert _composite(models, ["A", "B"]) == _reference_composite(models, ["A", "B"]) == [("A", "Up", 0.4)]
+
+
+def test_composite_matches_reference():
+    rng = random.Random(0)
+    for _ in range(300):
+        symbols = [f"S{i}" for i in range(rng.randint(1, 6))]
+        models = [
+            _FixedModel([
+                (rng.choice(symbols), rng.choice(["Up", "Down", "Flat", "Sideways"]),
+                 rng.choice([None, 0.0, round(rng.random(), 3)]))
+                for _ in range(rng.randint(0, 6))
+            ])
+            for _ in range(rng.randint(1, 4))
+        ]
+        expected = _reference_composite(models, symbols)
+        result = _composite(models, symbols)
+        assert [item[:2] for item in result] == [item[:2] for item in expected]
+        np.testing.assert_allclose([item[2] for item in result], [item[2] for item in expected])
+
+
+def _random_walk(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.cumprod(1.0 + rng.normal(0.0, 0.02, size))
+
+
+def _update_timeline(model, symbol, prices):
+    timeline = []
+    for bar, price in enumerate(prices):
+        insight = model.update(symbol, price)
+        if insight is not None:
+            timeline.append((bar, insight.direction))
+    return timeline
+
+
+def test_incremental_update_matches_vectorized():
+    prices = _random_walk(3000)
+    model = se.MovingAverageCrossAlphaModel(fast_period=5, slow_period=12)
+    expected = [(bar, insight.direction) for bar, insight in model.generate_insights_vectorized("A", prices)]
+    assert len(expected) > 100
+    assert _update_timeline(model, "A", prices.tolist()) == expected
+
+
+def test_incremental_update_rejects_invalid_prices():
+    prices = _random_walk(500, seed=1)
+    model = se.MovingAverageCrossAlphaModel(fast_period=5, slow_period=12)
+    expected = [(bar, insight.direction) for bar, insight in model.generate_insights_vectorized("A", prices)]
+
+    # 在第200个bar前插入无效价格：被跳过并记录，其后的交叉时间线不受影响
+    with_invalid = prices.tolist()
+    with_invalid[200:200] = [float("nan"), float("inf")]
+    timeline = _update_timeline(model, "A", with_invalid)
+    assert model.errors == [("A", "价格数据包含无效值，跳过")] * 2
+    assert [(bar if bar < 200 else bar - 2, direction) for bar, direction in timeline] == expected